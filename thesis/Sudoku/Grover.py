@@ -1,6 +1,7 @@
 """This module defines the class Grover."""
 
 import numpy as np
+from functools import lru_cache
 from itertools import chain, combinations
 
 from qiskit import QuantumCircuit, ClassicalRegister, QuantumRegister, IBMQ, execute
@@ -13,10 +14,14 @@ class Grover:
     ----------
     tuples : [(int, int)]
         list of all field pairs that need to be considered in the algorithm
+    normalized_dict : {int : int}
+        the normalized index 0..n for every field index in the tuples
     normalized_tuples : [(int, int)]
         tuples normalized to 0..n field_index
     normalized_field_values : {int : int}
         the value for each field by normalized index which has a set value
+    debug_barriers : bool
+        whether barriers are placed between the parts of the circuit
     circuit : quantumCircuit
         the quantum circuit based on the tuples
     Methods
@@ -27,7 +32,8 @@ class Grover:
         runs the quantum circuit and returns the number of appearence for each result
     """
 
-    def __init__(self, tuples: list, field_values: dict, subunit_height: int, subunit_width: int):
+    def __init__(self, tuples: list, field_values: dict, subunit_height: int, subunit_width: int,
+                 debug_barriers: bool = False):
         """
         Constructs the necessary attributes for the Grover class.
 
@@ -41,34 +47,47 @@ class Grover:
             height a subunit has
         subunit_width : int
             width a subunit has
+        debug_barriers : bool
+            if True barriers are placed between the parts of the circuit, mainly for printing during development
         """
         self.tuples = tuples
+        self.normalized_dict = self.__get_normalized_dict()
         self.normalized_tuples = self.__get_normalized_tuples()
         self.normalized_field_values = self.__get_normalized_field_values(field_values)
         self.subunit_height = subunit_height
         self.subunit_width = subunit_width
+        self.debug_barriers = debug_barriers
         self.circuit = self.__set_circuit()
     
-    def __get_normalized_tuples(self) -> list:
+    def __get_normalized_dict(self) -> dict:
         """
         Tuples are given in a non normalized way as there are not all field indexes in the tuples.
         This means tuples could contain only n unique filed indexes but the field index could be
-        higher than n. This function normalizes the tuples starting from 0 going up to n so the qubit
+        higher than n. This function maps every field index in the tuples to 0..n so the qubit
         init values can be applied later without problems.
+
+        Returns
+        -------
+        {int : int}
+            The original field index (key) and its normalized index (value)
+        """
+        # first a set of all field indexes that appear in the tuples is generated
+        # the set gets sorted and every field index gets mapped to an int 0..n
+        field_index_set = {t for tup in self.tuples for t in tup}
+        normalized_dict = {original:index for index, original in enumerate(sorted(field_index_set))}
+
+        return normalized_dict
+
+    def __get_normalized_tuples(self) -> list:
+        """
+        Returns the tuples with every field index replaced by its normalized index.
         
         Returns
         -------
         [(int, int)]
             The tupels normalized so the minimum value is 0 and the max is n
         """
-        # first a set of all field indexes that appear in the tuples is generated
-        # the set gets ordered and every field index gets mapped to an int 0..n
-        # the new tuple list is generated and returned
-        # info: sets are by default allready ordered ascending
-        field_index_set = set([t for tup in self.tuples for t in tup])
-        normalized_dict = {original:index for index, original in enumerate(field_index_set)}
-
-        normalized_tuples = [(normalized_dict.get(a), normalized_dict.get(b)) for (a, b) in self.tuples]
+        normalized_tuples = [(self.normalized_dict.get(a), self.normalized_dict.get(b)) for (a, b) in self.tuples]
 
         return normalized_tuples
     
@@ -87,14 +106,7 @@ class Grover:
         {int, int}
             The field indexes normalized so the minimum value is 0 and the max is n and their values
         """
-        # first a set of all field indexes that appear in the tuples is generated
-        # the set gets ordered and every field index gets mapped to an int 0..n
-        # the new tuple list is generated and returned
-        # info: sets are by default allready ordered ascending
-        field_index_set = set([t for tup in self.tuples for t in tup])
-        normalized_dict = {original:index for index, original in enumerate(field_index_set)}
-
-        normalized_field_values = {normalized_dict.get(k) : v for k, v in field_values.items()}
+        normalized_field_values = {self.normalized_dict.get(k) : v for k, v in field_values.items()}
 
         return normalized_field_values
 
@@ -133,16 +145,20 @@ class Grover:
 
         return re_gate
     
-    def __get_all_sublists(self, n: int, exclude: int) -> list:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def __get_all_sublists(n: int, exclude: int) -> tuple:
         """
         A helper function for __flipper to find all sublists of a list without one specific index.
+        The result only depends on the arguments, so it is cached and shared by all calls.
         """
         starting_list = [x for x in range(n) if x != exclude]
         max_n = n if exclude != -1 else n+1
-        re_list = list(chain.from_iterable(combinations(starting_list, b) for b in range(1, max_n)))
-        return re_list
+        re_tuple = tuple(chain.from_iterable(combinations(starting_list, b) for b in range(1, max_n)))
+        return re_tuple
 
-    def __flipper(self, qc: QuantumCircuit, x: int, y: int, cmp: QuantumRegister, tup_index: int, color_size: int):
+    def __flipper(self, qc: QuantumCircuit, x: int, y: int, cmp: QuantumRegister, tup_index: int, color_size: int,
+                  sublists_part_3: list, sublists_part_2: tuple):
         """
         Sets one output Qubit to state 1 (equal) or 0 (not equal) for two Qubits x and y.
         Manipulates the state of cmp in the QuantumCircuit qc.
@@ -161,40 +177,45 @@ class Grover:
             The index of the tuple in the tuple list, needed for choosing the right compare qubits
         color_size : int
             The number of bits used to encode the colors in this problem
+        sublists_part_3 : [((int))]
+            For every bit i of a color all sublists of the color bits without i
+        sublists_part_2 : ((int))
+            All sublists of the color bits
         """
         # TODO: reduce number of compare bits by just increasing gates
         # first all single bit pairs of two fileds are compared to one compare bit each
         # then all compare bits are compared in a single mct to a final compare bit
+        # the gate methods and the target qubit are bound once as they are used in every loop
+        cx = qc.cx
+        ccx = qc.ccx
+        target = cmp[tup_index]
 
         for i in range(color_size):
-            sublists_part_3 = self.__get_all_sublists(color_size, i)
             x_i = x*color_size+i
             y_i = y*color_size+i
             # Part 1 see explaination black_box_generalization.jpeg
-            qc.cx([x_i, y_i], cmp[tup_index])
+            cx([x_i, y_i], target)
 
             # Part 3
-            for e in sublists_part_3:
+            for e in sublists_part_3[i]:
                 list_e = list(e)
                 # if the lenth of this list is 1 you just campare two bits and dont have to do it twice
                 # otherwise you get the same ones twice
                 if len(list_e) == 1:
-                    qc.ccx(x_i, y_i+list_e[0], cmp[tup_index])
+                    ccx(x_i, y_i+list_e[0], target)
                 else:
                     pass
             
         # Part 2
-        sublists_part_2 = self.__get_all_sublists(color_size, -1)
         for e in sublists_part_2:
             list_e = list(e)
             # if more than on eelement is in list_e you apply a mct to them within one color register
             # this can be generalized and combined with Part 1 later in the optimization
             if len(list_e) > 1:
-                print("ok")
                 control_list_x = [x*color_size+x_i for x_i in list_e]
                 control_list_y = [y*color_size+y_i for y_i in list_e]
-                qc.ccx(control_list_x[:1], control_list_x[1:], cmp[tup_index])
-                qc.ccx(control_list_y[:1], control_list_y[1:], cmp[tup_index])
+                qc.mct(control_list_x, target)
+                qc.mct(control_list_y, target)
     
     def __graph_coloring_oracle(self, qc: QuantumCircuit, compare_qubits: QuantumRegister, 
                                 out_qubit: QuantumRegister, color_size: int):
@@ -218,13 +239,21 @@ class Grover:
         # then on all final compare output bits a mct is perfromed that if all values are 1
         # the last len(self.normalized_tuples) bits are the final comapre output bits
         # a mct on the final output bits flips the output qubit and the phase flips to negative values
+        # the comparisons are built once and undone with their inverse after the mct
+        # the sublists are the same for every tuple so they are only looked up once
+        sublists_part_3 = [self.__get_all_sublists(color_size, i) for i in range(color_size)]
+        sublists_part_2 = self.__get_all_sublists(color_size, -1)
+
+        compare_qc = QuantumCircuit(*qc.qregs)
         for index, tup in enumerate(self.normalized_tuples):
-            self.__flipper(qc, tup[0], tup[1], compare_qubits, index, color_size)
+            self.__flipper(compare_qc, tup[0], tup[1], compare_qubits, index, color_size,
+                           sublists_part_3, sublists_part_2)
+
+        qc.compose(compare_qc, inplace=True)
         # for every tupel there is one final compare bit
         # the final compare bits sre at the end of the caompare_qubits
         qc.mct(compare_qubits[-len(self.normalized_tuples):], out_qubit)
-        for index, tup in enumerate(self.normalized_tuples):
-            self.__flipper(qc, tup[0], tup[1], compare_qubits, index, color_size)
+        qc.compose(compare_qc.inverse(), inplace=True)
 
 
     def __get_color_size(self) -> int:
@@ -243,11 +272,12 @@ class Grover:
         
         return bits_needed
 
-    def __get_qubit_inits(self, number_of_qubits: int, color_size: int) -> dict:
+    def __get_qubit_inits(self, number_of_qubits: int, color_size: int) -> tuple:
         """
-        Returns a dict aof all qubits with known positions.
-        The key is the index in the QuantumRegister.
-        The value ist eighter [1, 0], [0, 1] or [np.sqrt(2), np.sqrt(2)]
+        Returns the positions of the input qubits that have to be initialized.
+        The positions are the indexes in the QuantumRegister. The qubits of fields with a known
+        value are set to 1 where the value has a 1 bit, the qubits of all other fields are set to superposition.
+        Qubits that are in neither array stay 0.
         
         Parameters
         ----------
@@ -258,52 +288,27 @@ class Grover:
 
         Returns
         -------
-        {int : list}
+        (np.ndarray, np.ndarray)
+            The positions of the qubits set to 1 and the positions of the qubits in superposition
         """
-        # go through all input qubits in steps of size color_size
-        # check for the index i - this is the normalized number of the field represented by
-        # the qubits - what its original field_index is
-        # then get the value for this field from the field_values and set the init value
-        # if there is no value in the dict the bits are set to superposition
-        # otherwise the binary is generated and very bit gets set
-        re_dict = {}
-
-        for i in range(int(number_of_qubits/color_size)):
-            field_value = self.normalized_field_values.get(i)
-            for j in range(color_size):
-                if field_value == None:
-                    re_dict[i*color_size+j] = [1, 1]/np.sqrt(2)
-                else:
-                    binary_value = self.__padded_binary(field_value, color_size)
-                    if binary_value[j] == '0':
-                        re_dict[i*color_size+j] = [1, 0]
-                    else:
-                        re_dict[i*color_size+j] = [0, 1]
-        
-        return re_dict
+        # the value of every field represented by the input qubits is written to an array
+        # fields without a value in the normalized_field_values are marked with -1
+        # the bits of all values are extracted at once by shifting, most significant bit first
+        # the qubits of fields marked with -1 are in superposition, all others with bit 1 are set to 1
+        number_of_fields = number_of_qubits//color_size
+        field_values = np.full(number_of_fields, -1)
+        known_fields = [(k, v) for k, v in self.normalized_field_values.items() if k is not None]
+        if known_fields:
+            indexes, values = zip(*known_fields)
+            field_values[list(indexes)] = values
 
-    def __padded_binary(self, dec: int, color_size: int) -> str:
-        """
-        Helper function for get_qubit_inits that genreates a binary for a decimal number and
-        pads it with leading 0 if it is not length of color_size.
-        
-        Parameters
-        ----------
-        dec : int
-            The decimal representation of the number
-        color_size : int
-            The length the padded binnary has to have
+        bits = ((field_values[:, np.newaxis] >> np.arange(color_size-1, -1, -1)) & 1).reshape(-1)
+        unknown = np.repeat(field_values == -1, color_size)
 
-        Returns
-        -------
-        str
-            The padded binary string
-        """
-        binary = str(bin(dec))[2:]
-        padding = '0' * (color_size - len(binary))
-        padded_binary = padding + binary
+        x_positions = np.flatnonzero((bits == 1) & ~unknown)
+        superposition_positions = np.flatnonzero(unknown)
 
-        return padded_binary
+        return x_positions, superposition_positions
 
     def __get_iterations_needed(self, number_of_qubits: int) -> int:
         """
@@ -335,7 +340,7 @@ class Grover:
         # fields with n-bit encoding we need n caompare qubits plus 1 extra compare
         # qubit to show if all single compared qubits were the same for two fields
         # with these numbers the circuit gets constructed
-        unique_bits = len(set([t for tup in self.tuples for t in tup]))
+        unique_bits = len(self.normalized_dict)
         color_size = self.__get_color_size()
 
         input_bits_needed = unique_bits*color_size
@@ -345,8 +350,8 @@ class Grover:
         unknown_qubits_needed = (unique_bits - len(self.normalized_field_values.keys())) * color_size
         iterations_needed = self.__get_iterations_needed(unknown_qubits_needed)
 
-        qubit_inits = self.__get_qubit_inits(input_bits_needed, color_size)
-        unknown_qubits_positions = [pos for pos, val in qubit_inits.items() if val[0] not in [0, 1]]
+        x_positions, superposition_positions = self.__get_qubit_inits(input_bits_needed, color_size)
+        unknown_qubits_positions = superposition_positions.tolist()
 
         in_qubits = QuantumRegister(input_bits_needed, name='in')
         compare_qubits = QuantumRegister(compare_bits_needed, name='cmp')
@@ -356,20 +361,38 @@ class Grover:
         qc = QuantumCircuit(in_qubits, compare_qubits, out_qubit, classical_bits)
 
         # the qubits are initialized 
+        # all qubits start in |0> so the qubits set to 1 get a x and the superposition a h
         # afterwards the iterations are calculated and the circuit gets constructed
-        qc.initialize([0, 1], out_qubit)
+        qc.x(out_qubit)
         qc.h(out_qubit)
         
-        for position, init in qubit_inits.items():
-            qc.initialize(init, in_qubits[position])
-
-        qc.barrier()
-
-        for _ in range(iterations_needed):
-            self.__graph_coloring_oracle(qc, compare_qubits, out_qubit, color_size)
-            qc.barrier()
-            qc.append(self.__build_diffuser(unknown_qubits_needed), unknown_qubits_positions)
+        # each group of qubits needs only one call
+        if x_positions.size:
+            qc.x([in_qubits[pos] for pos in x_positions.tolist()])
+        if unknown_qubits_positions:
+            qc.h([in_qubits[pos] for pos in unknown_qubits_positions])
+
+        # barriers only structure the printed circuit and block transpiler optimizations
+        # so they are only placed when debug_barriers is set
+        if self.debug_barriers:
             qc.barrier()
+
+        # the oracle and the diffuser are the same in every iteration
+        # so they are built once as gates and only appended in the loop
+        if iterations_needed > 0:
+            oracle_qc = QuantumCircuit(in_qubits, compare_qubits, out_qubit)
+            self.__graph_coloring_oracle(oracle_qc, compare_qubits, out_qubit, color_size)
+            oracle_gate = oracle_qc.to_gate()
+            oracle_gate.name = "Oracle"
+            diffuser_gate = self.__build_diffuser(unknown_qubits_needed)
+
+            for _ in range(iterations_needed):
+                qc.append(oracle_gate, in_qubits[:] + compare_qubits[:] + out_qubit[:])
+                if self.debug_barriers:
+                    qc.barrier()
+                qc.append(diffuser_gate, unknown_qubits_positions)
+                if self.debug_barriers:
+                    qc.barrier()
         
         qc.measure(in_qubits, classical_bits)
 
@@ -1,13 +1,18 @@
 """This module defines the class Board. A Board represents a game of sudoku."""
 
+from functools import lru_cache
+
+import numpy as np
+
 class Board:
     """
     A class to represent a sudoku grid.
     
     Attributes
     ----------
-    board_state : [[int]]
-        a two dimensional list of ints representing the board
+    board_state : np.ndarray
+        a two dimensional int8 array representing the board
+        change it with update_board so the open tuples are recalculated
     unit_heigth : int
         the heigth of a sudoku subunit starting at 1..n
     unit_wifth : int
@@ -20,6 +25,9 @@ class Board:
         a list of all single field pairs that are not allowed to be the same value
         this list is the minimum subset of all possible field pairs which need to be checked
         to achieve a valid solution
+    peer_edges : np.ndarray
+        all field pairs that are not allowed to be the same value regardless of the board_state
+        one row (vert, lat, vert, lat) per pair, only depends on the unit and grid sizes
     
     Methods
     -------
@@ -63,6 +71,8 @@ class Board:
         self.height_in_fields = unit_height*grid_height
 
         self.__set_board(init_value)
+        self.__open_edges = None
+        self.peer_edges = self.__get_peer_edges(unit_height, unit_width, grid_height, grid_width)
 
     def __set_board(self, init_value: int):
         """
@@ -75,7 +85,7 @@ class Board:
             The value all fields are initialized with. Usually it is -1 to be empty.
         """
 
-        self.board_state = [[init_value for _ in range(self.width_in_fields)] for _ in range(self.height_in_fields)]
+        self.board_state = np.full((self.height_in_fields, self.width_in_fields), init_value, dtype=np.int8)
 
     def get_unit_size(self) -> tuple:
         """
@@ -97,6 +107,81 @@ class Board:
         """
         return (self.grid_height, self.grid_width)
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def __get_peer_edges(unit_height: int, unit_width: int, grid_height: int, grid_width: int) -> np.ndarray:
+        """
+        Finds all the pairs of two single fields that share a row, a column or a subunit.
+        These pairs only depend on the sizing of the board and not on its values,
+        so they are computed once per sizing, shared read only by all boards and filtered by get_open_tuples.
+        Acts as a helper function of the __init__ and is private.
+
+        Parameters
+        ----------
+        unit_heigth : int
+            the heigth of a sudoku subunit starting at 1..n
+        unit_wifth : int
+            the width of a sudoku subunit starting at 1..n
+        grid_heigth : int
+            the number of vertically stacked subunits starting at 1..n
+        grid_width : int
+            the number of laterally stacked subunits starting at 1..n
+
+        Returns
+        -------
+        np.ndarray
+            one row (vert, lat, vert, lat) for every pair
+        """
+        # i and j iterate the board state
+        # for every field all pairs in lateral direction all > j are taken
+        # in vertical directions all > i are taken
+        # for every field also the other field in the subunit are taken
+        # the lateral and vertical fields are not taken again
+        height_in_fields = unit_height*grid_height
+        width_in_fields = unit_width*grid_width
+        edges = []
+
+        for vert_index in range(height_in_fields):
+            for lat_index in range(width_in_fields):
+                # vertical pairs
+                for vert_sub_index in range(vert_index+1, height_in_fields):
+                    edges.append((vert_index, lat_index, vert_sub_index, lat_index))
+                # lateral pairs
+                for lat_sub_index in range(lat_index+1, width_in_fields):
+                    edges.append((vert_index, lat_index, vert_index, lat_sub_index))
+                # subunit pairs
+                vert_sub_start = vert_index-vert_index%unit_height
+                lat_sub_start = lat_index-lat_index%unit_width
+                for vert_sub_index in range(vert_index+1, vert_sub_start+unit_height):
+                    for lat_sub_index in range(lat_sub_start, lat_sub_start+unit_width):
+                        if lat_index != lat_sub_index:
+                            edges.append((vert_index, lat_index, vert_sub_index, lat_sub_index))
+
+        peer_edges = np.array(edges, dtype=np.int32).reshape(-1, 4)
+        peer_edges.setflags(write=False)
+
+        return peer_edges
+
+    def __get_open_edges(self) -> np.ndarray:
+        """
+        Selects the peer_edges where at least one of the two fields is empty.
+        Acts as a helper function of get_open_tuples and get_open_indexed_tuples and is private.
+
+        Returns
+        -------
+        np.ndarray
+            one row (vert, lat, vert, lat) for every open pair
+        """
+        # the open pairs only change with the board_state
+        # so they are kept until update_board resets them
+        if self.__open_edges is None:
+            board = self.board_state
+            edges = self.peer_edges
+            open_mask = (board[edges[:, 0], edges[:, 1]] == -1) | (board[edges[:, 2], edges[:, 3]] == -1)
+            self.__open_edges = edges[open_mask]
+
+        return self.__open_edges
+
     def get_open_tuples(self) -> list:
         """
         Finds all the pairs of two single fields that need to be different for the solution to be valid.
@@ -107,41 +192,9 @@ class Board:
         -------
         [((int, int), (int, int))]
         """
-        # i and j iterate the board state
-        # for every field all pairs in lateral direction all > j are checked
-        # in vertical directions all > i are checked
-        # for every field also the other field in the subunit are checked
-        # the lateral and vertical fields are not checked again
-        # if the current filed is the upper left field of a subunit we check all subunit pairs
+        # all pairs of fields in the same row, column or subunit are given by the peer_edges
         # if at least one of the fields has value -1 the pair is added to the return list
-        re_list = []
-
-        for vert_index in range(self.height_in_fields):
-            for lat_index in range(self.width_in_fields):
-                current_field = self.board_state[vert_index][lat_index]
-                # vertical pairs
-                for vert_sub_index in range(vert_index+1, self.height_in_fields):
-                    sub_field = self.board_state[vert_sub_index][lat_index]
-                    if min(current_field, sub_field) == -1:
-                        re_list.append(((vert_index, lat_index), 
-                                        (vert_sub_index, lat_index)))
-                # lateral pairs
-                for lat_sub_index in range(lat_index+1, self.width_in_fields):
-                    sub_field = self.board_state[vert_index][lat_sub_index]
-                    if min(current_field, sub_field) == -1:
-                        re_list.append(((vert_index, lat_index),
-                                        (vert_index, lat_sub_index)))
-                # subunit pairs
-                vert_sub_start = vert_index-vert_index%self.unit_height
-                lat_sub_start = lat_index-lat_index%self.unit_width
-                for vert_sub_index in range(vert_sub_start, vert_sub_start+self.unit_height):
-                    for lat_sub_index in range(lat_sub_start, lat_sub_start+self.unit_width):
-                        if vert_index != vert_sub_index and lat_index != lat_sub_index:
-                            if vert_sub_index > vert_index:
-                                sub_field = self.board_state[vert_sub_index][lat_sub_index]
-                                if min(current_field, sub_field) == -1:
-                                    re_list.append(((vert_index, lat_index), 
-                                                    (vert_sub_index, lat_sub_index)))
+        re_list = [((a, b), (c, d)) for a, b, c, d in self.__get_open_edges().tolist()]
 
         return re_list
 
@@ -155,16 +208,13 @@ class Board:
         -------
         [(int, int)]
         """
-        # index dicts has the tuples as keys and the indexes as values
-        index_dict = {(vert, lat):(vert*self.width_in_fields+lat) 
-                      for vert in range(self.height_in_fields)
-                      for lat in range(self.width_in_fields)}
-
-        open_tuples = self.get_open_tuples()
-        re_tuples = []
+        # the index of a field is vert*width_in_fields+lat
+        # so it is calculated for all open pairs at once
+        open_edges = self.__get_open_edges()
+        first_indexes = open_edges[:, 0]*self.width_in_fields + open_edges[:, 1]
+        second_indexes = open_edges[:, 2]*self.width_in_fields + open_edges[:, 3]
 
-        for tup in open_tuples:
-            re_tuples.append((index_dict[tup[0]], index_dict[tup[1]]))
+        re_tuples = list(zip(first_indexes.tolist(), second_indexes.tolist()))
         
         return re_tuples
 
@@ -185,9 +235,10 @@ class Board:
         -------
         None
         """
+        self.__open_edges = None
         for val, pos in zip(values, positions):
             try:
-                self.board_state[pos[0]][pos[1]] = val
+                self.board_state[pos[0], pos[1]] = val
             except IndexError:
                 print(f"The index {pos} is out of range. {val} could not be set to this field.")
 
@@ -197,4 +248,4 @@ class Board:
         This is mainly for testing during development.
         """
         for row in self.board_state:
-            print(row)
\ No newline at end of file
+            print(row.tolist())
\ No newline at end of file